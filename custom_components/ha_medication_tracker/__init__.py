@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from homeassistant.config_entries import ConfigEntry
@@ -22,6 +23,10 @@ PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BUTTON, Platform.SWITCH]
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Medication Tracker component."""
     hass.data.setdefault(DOMAIN, {})
+
+    # Services look up the coordinator on each call, so they only need
+    # registering once rather than per config entry
+    await async_setup_services(hass)
     return True
 
 
@@ -32,10 +37,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     # Store coordinator in hass data
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN]["coordinator"] = coordinator
+    hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    # Register services
-    await async_setup_services(hass)
+    # Run the first refresh off the startup critical path
+    entry.async_create_background_task(
+        hass, coordinator.async_refresh(), f"{DOMAIN}_first_refresh"
+    )
 
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -45,23 +52,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    try:
-        # Get coordinator
-        coordinator = hass.data[DOMAIN]["coordinator"]
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    # Save data while the platforms are being unloaded
+    unload_result, save_result = await asyncio.gather(
+        hass.config_entries.async_unload_platforms(entry, PLATFORMS),
+        coordinator.storage.async_save(),
+        return_exceptions=True,
+    )
+
+    if isinstance(save_result, Exception):
+        _LOGGER.error("Error saving Medication Tracker data: %s", save_result)
+    if isinstance(unload_result, Exception):
+        _LOGGER.error("Error unloading Medication Tracker: %s", unload_result)
+        return False
 
-        # Save data before unloading
+    # Shutting the coordinator down can't be undone, so only do it once the
+    # entry is really going away
+    if unload_result is True:
         await coordinator.async_shutdown()
+        hass.data[DOMAIN].pop(entry.entry_id)
 
-        # Unload platforms
-        unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-
-        if unload_ok:
-            hass.data[DOMAIN].pop("coordinator")
-        else:
-            return False
-
-    except Exception:
-        _LOGGER.exception("Error unloading Medication Tracker")
-        return False
-
-    return unload_ok
+    return unload_result
@@ -5,12 +5,15 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant.components.button import (
     ButtonEntity,
     ButtonEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
@@ -35,75 +38,47 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Medication Tracker buttons."""
-    coordinator = hass.data[DOMAIN].get("coordinator")
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
     if not coordinator:
         _LOGGER.error("Cannot set up buttons - coordinator not found")
         return
 
-    _LOGGER.debug("Setting up Medication Tracker buttons")
-    entities = []
-
-    # Create buttons for each patient
-    patients = coordinator.data.get("patients", [])
-    _LOGGER.debug("Found %d patients to create buttons for", len(patients))
-
-    for patient in patients:
-        _LOGGER.debug(
-            "Creating buttons for patient: %s", patient.get(ATTR_PATIENT_NAME)
-        )
-        # Create the patient device info
-        device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{entry.entry_id}_{patient['id']}")},
-            name=patient.get(ATTR_PATIENT_NAME, "Unknown Patient"),
-            manufacturer="Medication Tracker",
-            model="Patient Profile",
-            sw_version="1.0",
-        )
-
-        # Add temperature recording button
-        entities.append(
-            RecordTemperatureButton(
-                coordinator=coordinator,
-                entry=entry,
-                patient=patient,
-                device_info=device_info,
-            )
-        )
-
-        # Add medication dose buttons for each medication
-        patient_medications = [
-            med
-            for med_id, med in coordinator.data.get("medications", {}).items()
-            if med.get("patient_id") == patient["id"]
-        ]
+    get_medications_for = coordinator.get_medications_for
+    patient_infos = [
+        (patient, coordinator.device_info_for(patient))
+        for patient in coordinator.data.get("patients", {}).values()
+    ]
+
+    # Temperature buttons for each patient, then dose buttons for each
+    # of their medications
+    entities: list[ButtonEntity] = [
+        RecordTemperatureButton(coordinator, entry, patient, device_info)
+        for patient, device_info in patient_infos
+    ]
+    entities.extend(
+        RecordDoseButton(coordinator, entry, patient, medication, device_info)
+        for patient, device_info in patient_infos
+        for medication in get_medications_for(patient["id"])
+    )
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
         _LOGGER.debug(
-            "Found %d medications for patient %s",
-            len(patient_medications),
-            patient.get(ATTR_PATIENT_NAME),
+            "Created %d temperature buttons and %d dose buttons for %d patients",
+            len(patient_infos),
+            len(entities) - len(patient_infos),
+            len(patient_infos),
         )
-
-        for medication in patient_medications:
-            _LOGGER.debug(
-                "Creating button for medication: %s",
-                medication.get(ATTR_MEDICATION_NAME),
-            )
-            entities.append(
-                RecordDoseButton(
-                    coordinator=coordinator,
-                    entry=entry,
-                    patient=patient,
-                    medication=medication,
-                    device_info=device_info,
-                )
-            )
-
-    _LOGGER.debug("Created %d total buttons", len(entities))
     async_add_entities(entities)
 
 
 class RecordDoseButton(CoordinatorEntity, ButtonEntity):
     """Button for recording a medication dose."""
 
+    entity_description = ButtonEntityDescription(
+        key="record_dose",
+        icon="mdi:pill",
+    )
+
     def __init__(
         self,
         coordinator: MedicationTrackerCoordinator,
@@ -114,32 +89,40 @@ class RecordDoseButton(CoordinatorEntity, ButtonEntity):
     ) -> None:
         """Initialize the button."""
         super().__init__(coordinator)
-        self._patient = patient
-        self._medication = medication
-        self._entry = entry
+        self._patient_id = patient["id"]
+        self._medication_id = medication["id"]
         self._attr_device_info = device_info
+        medication_name = medication.get(ATTR_MEDICATION_NAME, "Unknown")
         self._attr_unique_id = (
-            f"{entry.entry_id}_medication_{medication['id']}_record_dose"
-        )
-        self._attr_name = (
-            f"Record Dose of {medication.get(ATTR_MEDICATION_NAME, 'Unknown')}"
+            f"{entry.entry_id}_medication_{self._medication_id}_record_dose"
         )
+        self._attr_name = f"Record Dose of {medication_name}"
+        self._attr_extra_state_attributes = self._build_attributes()
+        self._available = coordinator.last_update_success
 
-        self.entity_description = ButtonEntityDescription(
-            key="record_dose",
-            name=self._attr_name,
-            icon="mdi:pill",
-        )
+    @property
+    def _medication(self) -> dict[str, Any]:
+        """Return the medication from the coordinator data."""
+        return self.coordinator.data.get("medications", {}).get(self._medication_id, {})
+
+    @property
+    def _patient(self) -> dict[str, Any]:
+        """Return the patient from the coordinator data."""
+        return self.coordinator.data.get("patients", {}).get(self._patient_id, {})
 
     async def async_press(self) -> None:
         """Handle the button press."""
+        medication = self._medication
         try:
-            # Create the service data with default values from medication
-            service_data = {
-                "medication_id": self._medication["id"],
-                "dose_amount": self._medication.get(ATTR_MEDICATION_DOSAGE),
-                "dose_unit": self._medication.get(ATTR_MEDICATION_UNIT),
-            }
+            # Create the service data with default values from medication,
+            # leaving out the defaults the medication doesn't have
+            service_data = {"medication_id": self._medication_id}
+            dosage = medication.get(ATTR_MEDICATION_DOSAGE)
+            if dosage is not None:
+                service_data["dose_amount"] = dosage
+            unit = medication.get(ATTR_MEDICATION_UNIT)
+            if unit is not None:
+                service_data["dose_unit"] = unit
 
             # Call the service
             await self.hass.services.async_call(
@@ -148,24 +131,41 @@ class RecordDoseButton(CoordinatorEntity, ButtonEntity):
                 service_data,
                 blocking=True,
             )
-            await self.coordinator.async_request_refresh()
-        except (ValueError, KeyError, Exception) as ex:
+        except (HomeAssistantError, vol.Invalid, ValueError, KeyError) as ex:
             _LOGGER.error("Failed to record dose: %s", ex)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return additional state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Build the additional state attributes."""
+        medication = self._medication
         return {
-            "default_dosage": self._medication.get(ATTR_MEDICATION_DOSAGE),
-            "default_unit": self._medication.get(ATTR_MEDICATION_UNIT),
+            "default_dosage": medication.get(ATTR_MEDICATION_DOSAGE),
+            "default_unit": medication.get(ATTR_MEDICATION_UNIT),
             "patient_name": self._patient.get(ATTR_PATIENT_NAME),
-            "medication_name": self._medication.get(ATTR_MEDICATION_NAME),
+            "medication_name": medication.get(ATTR_MEDICATION_NAME),
         }
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the state only if the attributes or availability changed."""
+        attributes = self._build_attributes()
+        if (
+            attributes == self._attr_extra_state_attributes
+            and self.coordinator.last_update_success == self._available
+        ):
+            return
+        self._attr_extra_state_attributes = attributes
+        self._available = self.coordinator.last_update_success
+        super()._handle_coordinator_update()
+
 
 class RecordTemperatureButton(CoordinatorEntity, ButtonEntity):
     """Button for recording a patient's temperature."""
 
+    entity_description = ButtonEntityDescription(
+        key="record_temperature",
+        icon="mdi:thermometer",
+    )
+
     def __init__(
         self,
         coordinator: MedicationTrackerCoordinator,
@@ -175,28 +175,22 @@ class RecordTemperatureButton(CoordinatorEntity, ButtonEntity):
     ) -> None:
         """Initialize the button."""
         super().__init__(coordinator)
-        self._patient = patient
-        self._entry = entry
+        self._patient_id = patient["id"]
         self._attr_device_info = device_info
+        patient_name = patient.get(ATTR_PATIENT_NAME, "Unknown")
         self._attr_unique_id = (
-            f"{entry.entry_id}_patient_{patient['id']}_record_temperature"
-        )
-        self._attr_name = (
-            f"Record Temperature for {patient.get(ATTR_PATIENT_NAME, 'Unknown')}"
-        )
-
-        self.entity_description = ButtonEntityDescription(
-            key="record_temperature",
-            name=self._attr_name,
-            icon="mdi:thermometer",
+            f"{entry.entry_id}_patient_{self._patient_id}_record_temperature"
         )
+        self._attr_name = f"Record Temperature for {patient_name}"
+        self._attr_extra_state_attributes = self._build_attributes()
+        self._available = coordinator.last_update_success
 
     async def async_press(self) -> None:
         """Handle the button press."""
         try:
             # Create the service data
             service_data = {
-                "patient_id": self._patient["id"],
+                "patient_id": self._patient_id,
                 "temperature_value": 37.0,  # Default temperature
             }
 
@@ -207,14 +201,26 @@ class RecordTemperatureButton(CoordinatorEntity, ButtonEntity):
                 service_data,
                 blocking=True,
             )
-            await self.coordinator.async_request_refresh()
-        except (ValueError, KeyError, Exception) as ex:
+        except (HomeAssistantError, vol.Invalid, ValueError, KeyError) as ex:
             _LOGGER.error("Failed to record temperature: %s", ex)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return additional state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Build the additional state attributes."""
+        patient = self.coordinator.data.get("patients", {}).get(self._patient_id, {})
         return {
-            "patient_name": self._patient.get(ATTR_PATIENT_NAME),
+            "patient_name": patient.get(ATTR_PATIENT_NAME),
             "default_unit": "°C",
         }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the state only if the attributes or availability changed."""
+        attributes = self._build_attributes()
+        if (
+            attributes == self._attr_extra_state_attributes
+            and self.coordinator.last_update_success == self._available
+        ):
+            return
+        self._attr_extra_state_attributes = attributes
+        self._available = self.coordinator.last_update_success
+        super()._handle_coordinator_update()
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import logging
-import uuid
+import secrets
 from typing import Any, Dict, Optional
 
 import voluptuous as vol
@@ -28,12 +28,16 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Supported weight units, shared by every patient schema
+WEIGHT_UNITS = ("kg", "lb")
+_WEIGHT_UNIT_VALIDATOR = vol.In(WEIGHT_UNITS)
+
 # Schema for adding a patient
 ADD_PATIENT_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_PATIENT_NAME): str,
         vol.Optional(ATTR_PATIENT_WEIGHT): vol.Coerce(float),
-        vol.Optional(ATTR_PATIENT_WEIGHT_UNIT, default="kg"): vol.In(["kg", "lb"]),
+        vol.Optional(ATTR_PATIENT_WEIGHT_UNIT, default="kg"): _WEIGHT_UNIT_VALIDATOR,
         vol.Optional(ATTR_PATIENT_AGE): vol.Coerce(int),
     }
 )
@@ -63,6 +67,37 @@ MEDICATION_SELECTION_SCHEMA = vol.Schema(
     }
 )
 
+# Schema for the options menu
+MENU_SCHEMA = vol.Schema(
+    {
+        vol.Required("next_step"): vol.In(
+            {
+                "add_patient": "Add New Patient",
+                "manage_patient": "Manage Existing Patient",
+            }
+        )
+    }
+)
+
+# Schema for the patient management menu
+PATIENT_MENU_SCHEMA = vol.Schema(
+    {
+        vol.Required("action"): vol.In(
+            {
+                "add_medication": "Add Medication",
+                "remove_medication": "Remove Medication",
+                "back": "Back to Main Menu",
+            }
+        )
+    }
+)
+
+
+def _append_to_list(joined: str, name: str) -> str:
+    """Append a name to a comma-separated list of names."""
+    return f"{joined}, {name}" if joined else name
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Medication Tracker."""
 
@@ -71,7 +106,10 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         """Initialize the config flow."""
         self.patients = []
+        self._patient_list = ""
         self.medications = {}
+        self._meds_by_patient: dict[str, dict[str, dict[str, Any]]] = {}
+        self._medication_lists: dict[str, str] = {}
         self.current_patient = None
 
     async def async_step_user(
@@ -113,7 +151,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=PATIENT_SELECTION_SCHEMA,
             description_placeholders={
                 "patient_count": str(len(self.patients)),
-                "patient_list": ", ".join(p.get(ATTR_PATIENT_NAME, "") for p in self.patients),
+                "patient_list": self._patient_list,
             },
         )
 
@@ -125,7 +163,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             try:
-                patient_id = str(uuid.uuid4())
+                patient_id = secrets.token_hex(16)
                 patient_data = {
                     "id": patient_id,
                     ATTR_PATIENT_NAME: user_input[ATTR_PATIENT_NAME],
@@ -134,6 +172,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     ATTR_PATIENT_AGE: user_input.get(ATTR_PATIENT_AGE),
                 }
                 self.patients.append(patient_data)
+                self._patient_list = _append_to_list(
+                    self._patient_list, patient_data[ATTR_PATIENT_NAME]
+                )
                 self.current_patient = patient_data
                 return await self.async_step_medication_selection()
             except Exception as ex:
@@ -156,10 +197,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return await self.async_step_add_medication()
 
         # Get medications for current patient
-        patient_medications = [
-            med for med_id, med in self.medications.items()
-            if med.get("patient_id") == self.current_patient["id"]
-        ]
+        patient_medications = self._meds_by_patient.get(
+            self.current_patient["id"], {}
+        ).values()
 
         return self.async_show_form(
             step_id="medication_selection",
@@ -167,7 +207,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             description_placeholders={
                 "patient_name": self.current_patient.get(ATTR_PATIENT_NAME, "Unknown"),
                 "medication_count": str(len(patient_medications)),
-                "medication_list": ", ".join(med.get(ATTR_MEDICATION_NAME, "") for med in patient_medications),
+                "medication_list": self._medication_lists.get(
+                    self.current_patient["id"], ""
+                ),
             },
         )
 
@@ -179,7 +221,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             try:
-                medication_id = str(uuid.uuid4())
+                medication_id = secrets.token_hex(16)
                 medication_data = {
                     "id": medication_id,
                     "patient_id": self.current_patient["id"],
@@ -190,6 +232,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     ATTR_MEDICATION_INSTRUCTIONS: user_input.get(ATTR_MEDICATION_INSTRUCTIONS),
                 }
                 self.medications[medication_id] = medication_data
+                self._meds_by_patient.setdefault(self.current_patient["id"], {})[
+                    medication_id
+                ] = medication_data
+                self._medication_lists[self.current_patient["id"]] = _append_to_list(
+                    self._medication_lists.get(self.current_patient["id"], ""),
+                    medication_data[ATTR_MEDICATION_NAME],
+                )
                 return await self.async_step_medication_selection()
             except Exception as ex:
                 _LOGGER.exception("Error adding medication: %s", ex)
@@ -234,19 +283,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             elif user_input["next_step"] == "manage_patient":
                 return await self.async_step_select_patient()
 
-        return self.async_show_form(
-            step_id="menu",
-            data_schema=vol.Schema(
-                {
-                    vol.Required("next_step"): vol.In(
-                        {
-                            "add_patient": "Add New Patient",
-                            "manage_patient": "Manage Existing Patient",
-                        }
-                    )
-                }
-            ),
-        )
+        return self.async_show_form(step_id="menu", data_schema=MENU_SCHEMA)
 
     async def async_step_add_patient(
         self, user_input: dict[str, Any] | None = None
@@ -255,7 +292,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         errors = {}
 
         if user_input is not None:
-            coordinator = self.hass.data[DOMAIN].get("coordinator")
+            coordinator = self.hass.data[DOMAIN].get(self.config_entry.entry_id)
             if coordinator:
                 try:
                     patient_id = await coordinator.add_patient(user_input)
@@ -275,10 +312,14 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Select a patient to manage."""
-        coordinator = self.hass.data[DOMAIN].get("coordinator")
+        coordinator = self.hass.data[DOMAIN].get(self.config_entry.entry_id)
         if not coordinator:
             return await self.async_step_menu()
 
+        if user_input is not None:
+            self.selected_patient_id = user_input["patient_id"]
+            return await self.async_step_patient_menu()
+
         patients = coordinator.storage.get_patients()
         if not patients:
             return self.async_show_form(
@@ -286,16 +327,12 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 errors={"base": "no_patients"},
             )
 
-        if user_input is not None:
-            self.selected_patient_id = user_input["patient_id"]
-            return await self.async_step_patient_menu()
-
         return self.async_show_form(
             step_id="select_patient",
             data_schema=vol.Schema(
                 {
                     vol.Required("patient_id"): vol.In(
-                        {p["id"]: p["name"] for p in patients}
+                        {p["id"]: p.get(ATTR_PATIENT_NAME, "Unknown") for p in patients}
                     ),
                 }
             ),
@@ -314,40 +351,17 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 return await self.async_step_menu()
 
         return self.async_show_form(
-            step_id="patient_menu",
-            data_schema=vol.Schema(
-                {
-                    vol.Required("action"): vol.In(
-                        {
-                            "add_medication": "Add Medication",
-                            "remove_medication": "Remove Medication",
-                            "back": "Back to Main Menu",
-                        }
-                    )
-                }
-            ),
+            step_id="patient_menu", data_schema=PATIENT_MENU_SCHEMA
         )
 
     async def async_step_select_medication(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Select a medication to remove."""
-        coordinator = self.hass.data[DOMAIN].get("coordinator")
+        coordinator = self.hass.data[DOMAIN].get(self.config_entry.entry_id)
         if not coordinator:
             return await self.async_step_patient_menu()
 
-        # Get medications for current patient
-        medications = [
-            med for med_id, med in coordinator.storage.get_medications().items()
-            if med.get("patient_id") == self.selected_patient_id
-        ]
-        
-        if not medications:
-            return self.async_show_form(
-                step_id="select_medication",
-                errors={"base": "no_medications"},
-            )
-
         if user_input is not None:
             try:
                 await coordinator.remove_medication(user_input["medication_id"])
@@ -359,12 +373,20 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     errors={"base": "remove_failed"},
                 )
 
+        # Get medications for current patient
+        medications = coordinator.get_medications_for(self.selected_patient_id)
+        if not medications:
+            return self.async_show_form(
+                step_id="select_medication",
+                errors={"base": "no_medications"},
+            )
+
         return self.async_show_form(
             step_id="select_medication",
             data_schema=vol.Schema(
                 {
                     vol.Required("medication_id"): vol.In(
-                        {m["id"]: m[ATTR_MEDICATION_NAME] for m in medications}
+                        {m["id"]: m.get(ATTR_MEDICATION_NAME, "Unknown") for m in medications}
                     ),
                 }
             ),
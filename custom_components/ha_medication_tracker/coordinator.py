@@ -3,16 +3,24 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Collection
 from datetime import datetime, timedelta
 import logging
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    ATTR_PATIENT_NAME,
+    ATTR_MEDICATION_NAME,
+    ATTR_MEDICATION_FREQUENCY,
+)
 from .storage import MedicationStorage
 
 _LOGGER = logging.getLogger(__name__)
@@ -27,7 +35,11 @@ class MedicationTrackerCoordinator(DataUpdateCoordinator):
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=1),
+            # No polling; a refresh is scheduled for when the next pending
+            # dose becomes available
+            update_interval=None,
+            # Only notify entities when a refresh actually changed the data
+            always_update=False,
         )
 
         # Store the config entry
@@ -36,6 +48,37 @@ class MedicationTrackerCoordinator(DataUpdateCoordinator):
         # Initialize storage
         self.storage = MedicationStorage(hass)
 
+        # Start with empty data so platforms can be set up before the
+        # first refresh has completed
+        self.data = {
+            "patients": {},
+            "medications": {},
+            "doses": {},
+            "temperatures": {},
+            "next_doses": {},
+        }
+
+        # Patients keyed by ID, only rebuilt after patients change
+        self._patients: dict[str, dict[str, Any]] = {}
+        self._snapshot_dirty = True
+
+        # Device info shared by every entity of a patient
+        self._device_info_cache: dict[str, DeviceInfo] = {}
+
+        # Last next-dose result per medication with the inputs it came from
+        self._next_dose_cache: dict[
+            str, tuple[tuple[str, float], float, dict[str, Any]]
+        ] = {}
+
+        # Medications whose next dose must be recalculated on the next pass
+        self._dirty_meds: set[str] = set()
+
+        # Next dose timestamps of the medications that are not available yet
+        self._pending_doses: dict[str, float] = {}
+
+        # Cancels the refresh scheduled for the next pending dose
+        self._unsub_next_dose: CALLBACK_TYPE | None = None
+
     async def async_setup(self) -> None:
         """Load storage data and initial config."""
         # Load storage
@@ -57,21 +100,36 @@ class MedicationTrackerCoordinator(DataUpdateCoordinator):
             # Save the initialized data
             await self.storage.async_save()
 
-        _LOGGER.debug("Storage loaded, performing initial refresh")
-        await self.async_refresh()
+        # Seed the entity-defining data; the first full refresh runs in the
+        # background once setup has finished
+        self._refresh_snapshot()
+        self.data = {
+            **self.data,
+            "patients": self._patients,
+            "medications": self.storage.get_medications(),
+            "doses": self.storage.get_doses(),
+            "temperatures": self.storage.get_temperatures(),
+        }
+        _LOGGER.debug("Storage loaded")
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch data."""
         # Get all data from storage
-        patients = self.storage.get_patients()
-        _LOGGER.debug("Retrieved patients from storage: %s", patients)
+        self._refresh_snapshot()
+        patients = self._patients
 
         medications = self.storage.get_medications()
         doses = self.storage.get_doses()
         temperatures = self.storage.get_temperatures()
 
-        # Calculate next doses
+        # Calculate next doses, forgetting medications that were removed
+        # together with their patient
         next_doses = self._calculate_next_doses(medications, doses)
+        self._dirty_meds.clear()
+        for medication_id in self._pending_doses.keys() - medications.keys():
+            del self._pending_doses[medication_id]
+            self._next_dose_cache.pop(medication_id, None)
+        self._schedule_next_dose_refresh()
 
         # Process data and calculate next doses
         return {
@@ -82,16 +140,60 @@ class MedicationTrackerCoordinator(DataUpdateCoordinator):
             "next_doses": next_doses,
         }
 
+    def _refresh_snapshot(self) -> None:
+        """Rebuild the patient map if the patients changed."""
+        if self._snapshot_dirty:
+            self._patients = self._patients_by_id()
+            self._snapshot_dirty = False
+
+    def _patients_by_id(self) -> dict[str, dict[str, Any]]:
+        """Return the stored patients keyed by patient ID."""
+        return {patient["id"]: patient for patient in self.storage.get_patients()}
+
+    def get_medications_for(self, patient_id: str) -> Collection[dict[str, Any]]:
+        """Return the medications belonging to a patient."""
+        # Storage keeps medications grouped by patient
+        return self.storage.get_medications(patient_id).values()
+
+    def device_info_for(self, patient: dict[str, Any]) -> DeviceInfo:
+        """Return the device info for a patient, reusing the cached one."""
+        patient_id = patient["id"]
+        device_info = self._device_info_cache.get(patient_id)
+        if device_info is None:
+            device_info = DeviceInfo(
+                identifiers={(DOMAIN, f"{self.config_entry.entry_id}_{patient_id}")},
+                name=patient.get(ATTR_PATIENT_NAME, "Unknown Patient"),
+                manufacturer="Medication Tracker",
+                model="Patient Profile",
+                sw_version="1.0",
+            )
+            self._device_info_cache[patient_id] = device_info
+        return device_info
+
     def _calculate_next_doses(
         self, medications: dict[str, Any], doses: dict[str, list[dict[str, Any]]]
     ) -> dict[str, Any]:
         """Calculate next available dose for each medication."""
         next_doses = {}
+        previous = self.data.get("next_doses", {})
         now = dt_util.utcnow()
+        now_ts = now.timestamp()
 
         for medication_id, medication in medications.items():
+            # Unchanged medications keep their previous result until their
+            # pending dose becomes available
+            previous_result = previous.get(medication_id)
+            if previous_result is not None and medication_id not in self._dirty_meds:
+                cached = self._next_dose_cache.get(medication_id)
+                if cached is None or cached[2]["available_now"] or now_ts < cached[1]:
+                    next_doses[medication_id] = previous_result
+                    continue
+
+            self._pending_doses.pop(medication_id, None)
+
             # Skip disabled medications
             if medication.get("disabled", False):
+                self._next_dose_cache.pop(medication_id, None)
                 next_doses[medication_id] = {
                     "available_now": False,
                     "next_time": None,
@@ -106,49 +208,55 @@ class MedicationTrackerCoordinator(DataUpdateCoordinator):
                 }
                 continue
 
-            # Sort doses by timestamp in descending order
-            sorted_doses = sorted(
-                doses[medication_id], key=lambda x: x["timestamp"], reverse=True
-            )
-
-            if not sorted_doses:
-                next_doses[medication_id] = {
-                    "available_now": True,
-                    "next_time": None,
-                }
-                continue
-
-            latest_dose = sorted_doses[0]
+            # Doses are stored in timestamp order, so the latest is last
+            latest_dose = doses[medication_id][-1]
             frequency_hours = float(
-                medication.get("frequency", 6)
+                medication.get(ATTR_MEDICATION_FREQUENCY, 6)
             )  # Default to 6 hours, ensure it's a float
 
+            # Reuse the previous result while the latest dose, the frequency
+            # and the availability are all unchanged
+            cache_key = (latest_dose["timestamp"], frequency_hours)
+            cached = self._next_dose_cache.get(medication_id)
+            if (
+                cached is not None
+                and cached[0] == cache_key
+                and (now_ts >= cached[1]) == cached[2]["available_now"]
+            ):
+                next_doses[medication_id] = cached[2]
+                if not cached[2]["available_now"]:
+                    self._pending_doses[medication_id] = cached[1]
+                continue
+
             try:
-                # Parse the timestamp and make it timezone-aware if needed
+                # dt_util.parse_datetime uses Home Assistant's ciso8601 fast path
                 timestamp_str = latest_dose["timestamp"]
-                if "+" in timestamp_str or timestamp_str.endswith("Z"):
-                    # Already timezone-aware
-                    last_dose_time = dt_util.parse_datetime(timestamp_str)
-                else:
-                    # Assume it's in local timezone and convert to UTC
-                    naive_dt = datetime.fromisoformat(timestamp_str)
-                    last_dose_time = dt_util.as_utc(naive_dt)
+                last_dose_time = dt_util.parse_datetime(timestamp_str)
 
                 if last_dose_time is None:
                     raise ValueError(f"Could not parse timestamp: {timestamp_str}")
 
+                # Naive timestamps are in local time, convert them to UTC
+                last_dose_time = dt_util.as_utc(last_dose_time)
+
                 next_dose_time = last_dose_time + timedelta(hours=frequency_hours)
                 available_now = now >= next_dose_time
 
                 next_doses[medication_id] = {
                     "available_now": available_now,
-                    "next_time": next_dose_time.isoformat()
-                    if not available_now
-                    else None,
+                    "next_time": next_dose_time if not available_now else None,
                     "last_dose_time": last_dose_time.isoformat(),
                     "last_dose_amount": latest_dose.get("amount"),
                     "last_dose_unit": latest_dose.get("unit"),
                 }
+                next_dose_ts = next_dose_time.timestamp()
+                self._next_dose_cache[medication_id] = (
+                    cache_key,
+                    next_dose_ts,
+                    next_doses[medication_id],
+                )
+                if not available_now:
+                    self._pending_doses[medication_id] = next_dose_ts
             except (ValueError, TypeError) as err:
                 _LOGGER.error(
                     "Error calculating next dose for medication %s: %s",
@@ -163,34 +271,101 @@ class MedicationTrackerCoordinator(DataUpdateCoordinator):
                     "last_dose_unit": latest_dose.get("unit"),
                 }
 
+        self._dirty_meds.difference_update(medications)
         return next_doses
 
+    @callback
+    def _schedule_next_dose_refresh(self) -> None:
+        """Schedule a refresh for when the soonest pending dose is due."""
+        if self._unsub_next_dose is not None:
+            self._unsub_next_dose()
+            self._unsub_next_dose = None
+
+        soonest = min(self._pending_doses.values(), default=None)
+        if soonest is None:
+            return
+
+        delay = soonest - dt_util.utcnow().timestamp()
+        self._unsub_next_dose = async_call_later(
+            self.hass, max(delay, 0), self._async_next_dose_due
+        )
+
+    @callback
+    def _push_next_dose(self, medication_id: str, medication: dict[str, Any]) -> None:
+        """Recalculate one medication's next dose and notify listeners."""
+        self._dirty_meds.add(medication_id)
+
+        # Only the next dose of this medication can have changed, so
+        # update just that entry instead of running a full refresh
+        next_doses = {
+            **self.data.get("next_doses", {}),
+            **self._calculate_next_doses(
+                {medication_id: medication}, self.storage.get_doses()
+            ),
+        }
+        self.async_set_updated_data({**self.data, "next_doses": next_doses})
+        self._schedule_next_dose_refresh()
+
+    @callback
+    def set_medication_tracking(self, medication_id: str, enabled: bool) -> bool:
+        """Enable or disable tracking for a medication."""
+        medication = self.storage.get_medication(medication_id)
+        if medication is None:
+            return False
+
+        medication["disabled"] = not enabled
+        self.storage.async_schedule_save()
+        self._push_next_dose(medication_id, medication)
+        return True
+
+    async def _async_next_dose_due(self, _now: datetime) -> None:
+        """Refresh once a pending dose has become available."""
+        self._unsub_next_dose = None
+        await self.async_refresh()
+
+    async def _push_update(self) -> None:
+        """Rebuild the data and notify listeners after a local change."""
+        self.async_set_updated_data(await self._async_update_data())
+
     async def add_patient(self, patient_data: dict[str, Any]) -> str:
         """Add a new patient."""
         patient_id = self.storage.add_patient(patient_data)
-        await self.storage.async_save()
-        await self.async_refresh()
+        self._device_info_cache.pop(patient_id, None)
+        self._snapshot_dirty = True
+        self.storage.async_schedule_save()
+        await self._push_update()
         return patient_id
 
     async def remove_patient(self, patient_id: str) -> bool:
         """Remove a patient."""
+        self._dirty_meds.update(
+            medication["id"] for medication in self.get_medications_for(patient_id)
+        )
         result = self.storage.remove_patient(patient_id)
-        await self.storage.async_save()
-        await self.async_refresh()
+        self._device_info_cache.pop(patient_id, None)
+        self._snapshot_dirty = True
+        self.storage.async_schedule_save()
+        await self._push_update()
         return result
 
     async def add_medication(self, medication_data: dict[str, Any]) -> str:
         """Add a new medication for a patient."""
         medication_id = self.storage.add_medication(medication_data)
-        await self.storage.async_save()
-        await self.async_refresh()
+        # The record may have replaced an existing one with a new frequency
+        self._dirty_meds.add(medication_id)
+        self._snapshot_dirty = True
+        self.storage.async_schedule_save()
+        await self._push_update()
         return medication_id
 
     async def remove_medication(self, medication_id: str) -> bool:
         """Remove a medication."""
         result = self.storage.remove_medication(medication_id)
-        await self.storage.async_save()
-        await self.async_refresh()
+        self._next_dose_cache.pop(medication_id, None)
+        self._pending_doses.pop(medication_id, None)
+        self._snapshot_dirty = True
+        self.storage.async_schedule_save()
+        await self._push_update()
         return result
 
     async def record_dose(
@@ -203,31 +378,24 @@ class MedicationTrackerCoordinator(DataUpdateCoordinator):
         if "timestamp" not in dose_data:
             dose_data["timestamp"] = dt_util.utcnow().isoformat()
 
-        _LOGGER.debug("Recording dose for medication %s: %s", medication_id, dose_data)
-
         # Get medication info for better logging
         medication = self.storage.get_medication(medication_id)
         if medication:
-            _LOGGER.debug("Medication found: %s", medication.get("name", medication_id))
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "Recording dose of %s: %s",
+                    medication.get(ATTR_MEDICATION_NAME, medication_id),
+                    dose_data,
+                )
         else:
             _LOGGER.warning("Medication with ID %s not found", medication_id)
 
         result = self.storage.add_dose(medication_id, dose_data)
 
         if result:
-            _LOGGER.debug("Dose recorded successfully, saving and refreshing")
-            await self.storage.async_save()
-
-            # Force immediate refresh
-            try:
-                fresh_data = await self._async_update_data()
-                self.async_set_updated_data(fresh_data)
-                _LOGGER.debug(
-                    "Data updated with new dose information: %s",
-                    fresh_data.get("doses", {}).get(medication_id, [])[-1:],
-                )
-            except (ValueError, TypeError, AttributeError) as err:
-                _LOGGER.error("Error refreshing data after dose record: %s", err)
+            _LOGGER.debug("Dose recorded successfully, saving and updating")
+            self.storage.async_schedule_save()
+            self._push_next_dose(medication_id, medication)
 
         return result
 
@@ -242,10 +410,16 @@ class MedicationTrackerCoordinator(DataUpdateCoordinator):
             temperature_data["timestamp"] = dt_util.utcnow().isoformat()
 
         result = self.storage.add_temperature(patient_id, temperature_data)
-        await self.storage.async_save()
-        await self.async_refresh()
+        if result:
+            self.storage.async_schedule_save()
+            # Temperatures are stored in place, so just notify listeners
+            self.async_set_updated_data(dict(self.data))
         return result
 
     async def async_shutdown(self) -> None:
-        """Save data when shutting down."""
-        await self.storage.async_save()
+        """Cancel the pending next-dose refresh when shutting down."""
+        # Data is saved by async_unload_entry while the platforms unload
+        if self._unsub_next_dose is not None:
+            self._unsub_next_dose()
+            self._unsub_next_dose = None
+        await super().async_shutdown()
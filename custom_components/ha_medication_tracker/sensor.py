@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from datetime import datetime
 import logging
+from collections.abc import Sequence
 from typing import Any, Dict, Optional
 
 from homeassistant.components.sensor import (
@@ -11,7 +12,7 @@ from homeassistant.components.sensor import (
     SensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
@@ -41,96 +42,42 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Medication Tracker sensors."""
-    coordinator = hass.data[DOMAIN].get("coordinator")
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
     if not coordinator:
         _LOGGER.error("Cannot set up sensors - coordinator not found")
         return
 
-    _LOGGER.debug("Setting up Medication Tracker sensors")
     entities = []
-    
-    # Create entities for each patient
-    patients = coordinator.data.get("patients", [])
-    _LOGGER.debug("Found %d patients to create sensors for", len(patients))
+    patients = coordinator.data.get("patients", {}).values()
     
     for patient in patients:
-        _LOGGER.debug("Creating sensors for patient: %s", patient.get(ATTR_PATIENT_NAME))
-        # Create the patient device info
-        device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{entry.entry_id}_{patient['id']}")},
-            name=patient.get(ATTR_PATIENT_NAME, "Unknown Patient"),
-            manufacturer="Medication Tracker",
-            model="Patient Profile",
-            sw_version="1.0",
-        )
+        device_info = coordinator.device_info_for(patient)
         
-        # Add patient status sensor
-        entities.append(
-            PatientStatusSensor(
-                coordinator=coordinator,
-                entry=entry,
-                patient=patient,
-                device_info=device_info,
-            )
-        )
+        # Add patient status and temperature sensors
+        entities.extend((
+            PatientStatusSensor(coordinator, entry, patient, device_info),
+            PatientTemperatureSensor(coordinator, entry, patient, device_info),
+        ))
         
-        # Add temperature sensor
-        entities.append(
-            PatientTemperatureSensor(
-                coordinator=coordinator,
-                entry=entry,
-                patient=patient,
-                device_info=device_info,
-            )
+        # Add next dose, last dose and compliance sensors for each medication
+        entities.extend(
+            sensor_class(coordinator, entry, patient, medication, device_info)
+            for medication in coordinator.get_medications_for(patient["id"])
+            for sensor_class in MEDICATION_SENSOR_CLASSES
+        )
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(
+            "Created %d sensors for %d patients", len(entities), len(patients)
         )
-        
-        # Add medication sensors for each medication
-        patient_medications = [
-            med for med_id, med in coordinator.data.get("medications", {}).items()
-            if med.get("patient_id") == patient["id"]
-        ]
-        _LOGGER.debug("Found %d medications for patient %s", len(patient_medications), patient.get(ATTR_PATIENT_NAME))
-        
-        for medication in patient_medications:
-            _LOGGER.debug("Creating sensors for medication: %s", medication.get(ATTR_MEDICATION_NAME))
-            # Next dose sensor
-            entities.append(
-                MedicationNextDoseSensor(
-                    coordinator=coordinator,
-                    entry=entry,
-                    patient=patient,
-                    medication=medication,
-                    device_info=device_info,
-                )
-            )
-            
-            # Last dose sensor
-            entities.append(
-                MedicationLastDoseSensor(
-                    coordinator=coordinator,
-                    entry=entry,
-                    patient=patient,
-                    medication=medication,
-                    device_info=device_info,
-                )
-            )
-            
-            # Compliance sensor
-            entities.append(
-                MedicationComplianceSensor(
-                    coordinator=coordinator,
-                    entry=entry,
-                    patient=patient,
-                    medication=medication,
-                    device_info=device_info,
-                )
-            )
-
-    _LOGGER.debug("Created %d total sensors", len(entities))
     async_add_entities(entities)
 
-class PatientStatusSensor(CoordinatorEntity, SensorEntity):
-    """Sensor representing a patient's overall status."""
+class PatientSensor(CoordinatorEntity, SensorEntity):
+    """Base class for sensors describing a patient."""
+
+    # Suffix of the unique ID and format of the name, set by each sensor
+    _unique_id_suffix: str
+    _name_format: str
 
     def __init__(
         self,
@@ -141,35 +88,98 @@ class PatientStatusSensor(CoordinatorEntity, SensorEntity):
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._patient = patient
-        self._entry = entry
+        self._patient_id = patient["id"]
         self._attr_device_info = device_info
-        self._attr_unique_id = f"{entry.entry_id}_patient_{patient['id']}_status"
-        self._attr_name = f"{patient.get(ATTR_PATIENT_NAME, 'Unknown')} Status"
-        
-        self.entity_description = SensorEntityDescription(
-            key="patient_status",
-            name=self._attr_name,
-            icon="mdi:account-check",
-        )
+        self._attr_unique_id = f"{entry.entry_id}_patient_{self._patient_id}_{self._unique_id_suffix}"
+        self._attr_name = self._name_format.format(patient.get(ATTR_PATIENT_NAME, "Unknown"))
+
+class MedicationSensor(CoordinatorEntity, SensorEntity):
+    """Base class for sensors describing one of a patient's medications."""
+
+    # Suffix of the unique ID and format of the name, set by each sensor
+    _unique_id_suffix: str
+    _name_format: str
+
+    def __init__(
+        self,
+        coordinator: MedicationTrackerCoordinator,
+        entry: ConfigEntry,
+        patient: Dict[str, Any],
+        medication: Dict[str, Any],
+        device_info: DeviceInfo,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._medication_id = medication["id"]
+        self._attr_device_info = device_info
+        self._attr_unique_id = f"{entry.entry_id}_medication_{self._medication_id}_{self._unique_id_suffix}"
+        self._attr_name = self._name_format.format(medication.get(ATTR_MEDICATION_NAME, "Unknown"))
+
+    def _doses(self) -> Sequence[Dict[str, Any]]:
+        """Return the medication's doses, oldest first."""
+        return self.coordinator.data.get("doses", {}).get(self._medication_id, ())
+
+class PatientStatusSensor(PatientSensor):
+    """Sensor representing a patient's overall status."""
+
+    entity_description = SensorEntityDescription(
+        key="patient_status",
+        icon="mdi:account-check",
+    )
+    _unique_id_suffix = "status"
+    _name_format = "{} Status"
+
+    def __init__(
+        self,
+        coordinator: MedicationTrackerCoordinator,
+        entry: ConfigEntry,
+        patient: Dict[str, Any],
+        device_info: DeviceInfo,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, patient, device_info)
+        self._attr_extra_state_attributes = self._build_attributes()
+        self._available = coordinator.last_update_success
 
     @property
     def native_value(self) -> str:
         """Return the patient's current status."""
         return "Active"  # Can be expanded with more status types
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Return additional state attributes."""
+    def _build_attributes(self) -> Dict[str, Any]:
+        """Build the additional state attributes."""
+        # Patients are updated in place, so read the current record
+        patient = self.coordinator.data.get("patients", {}).get(self._patient_id, {})
         return {
-            "weight": self._patient.get(ATTR_PATIENT_WEIGHT),
-            "weight_unit": self._patient.get(ATTR_PATIENT_WEIGHT_UNIT, "kg"),
-            "age": self._patient.get(ATTR_PATIENT_AGE),
+            "weight": patient.get(ATTR_PATIENT_WEIGHT),
+            "weight_unit": patient.get(ATTR_PATIENT_WEIGHT_UNIT, "kg"),
+            "age": patient.get(ATTR_PATIENT_AGE),
         }
 
-class PatientTemperatureSensor(CoordinatorEntity, SensorEntity):
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the state only if the attributes or availability changed."""
+        attributes = self._build_attributes()
+        if (
+            attributes == self._attr_extra_state_attributes
+            and self.coordinator.last_update_success == self._available
+        ):
+            return
+        self._attr_extra_state_attributes = attributes
+        self._available = self.coordinator.last_update_success
+        super()._handle_coordinator_update()
+
+class PatientTemperatureSensor(PatientSensor):
     """Sensor representing a patient's temperature history."""
 
+    entity_description = SensorEntityDescription(
+        key="temperature",
+        icon="mdi:thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+    )
+    _unique_id_suffix = "temperature"
+    _name_format = "{} Temperature"
+
     def __init__(
         self,
         coordinator: MedicationTrackerCoordinator,
@@ -178,41 +188,57 @@ class PatientTemperatureSensor(CoordinatorEntity, SensorEntity):
         device_info: DeviceInfo,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._patient = patient
-        self._entry = entry
-        self._attr_device_info = device_info
-        self._attr_unique_id = f"{entry.entry_id}_patient_{patient['id']}_temperature"
-        self._attr_name = f"{patient.get(ATTR_PATIENT_NAME, 'Unknown')} Temperature"
-        
-        self.entity_description = SensorEntityDescription(
-            key="temperature",
-            name=self._attr_name,
-            icon="mdi:thermometer",
-            device_class=SensorDeviceClass.TEMPERATURE,
+        super().__init__(coordinator, entry, patient, device_info)
+
+        # Temperatures are only ever added, so the count tells if they changed
+        self._state_key = (
+            len(self._temperatures()),
+            coordinator.last_update_success,
         )
+        self._attr_extra_state_attributes = self._build_attributes()
+
+    def _temperatures(self) -> Sequence[Dict[str, Any]]:
+        """Return the patient's temperatures, oldest first."""
+        return self.coordinator.data.get("temperatures", {}).get(self._patient_id, ())
 
     @property
     def native_value(self) -> Optional[float]:
         """Return the latest temperature."""
-        temperatures = self.coordinator.data.get("temperatures", {}).get(self._patient["id"], [])
+        temperatures = self._temperatures()
         if temperatures:
-            latest = sorted(temperatures, key=lambda x: x["timestamp"])[-1]
-            return latest.get("value")
+            # Temperatures are stored oldest to newest
+            return temperatures[-1].get("value")
         return None
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Return temperature history."""
-        temperatures = self.coordinator.data.get("temperatures", {}).get(self._patient["id"], [])
+    def _build_attributes(self) -> Dict[str, Any]:
+        """Build the temperature history attributes."""
+        temperatures = self._temperatures()
         return {
-            "history": sorted(temperatures, key=lambda x: x["timestamp"], reverse=True)[:10],
+            "history": temperatures[-10:][::-1],
             "unit": "°C",
         }
 
-class MedicationNextDoseSensor(CoordinatorEntity, SensorEntity):
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the state only if the temperatures or availability changed."""
+        state_key = (len(self._temperatures()), self.coordinator.last_update_success)
+        if state_key == self._state_key:
+            return
+        self._state_key = state_key
+        self._attr_extra_state_attributes = self._build_attributes()
+        super()._handle_coordinator_update()
+
+class MedicationNextDoseSensor(MedicationSensor):
     """Sensor representing when the next dose is due."""
 
+    entity_description = SensorEntityDescription(
+        key="next_dose",
+        icon="mdi:clock-time-four",
+        device_class=SensorDeviceClass.TIMESTAMP,
+    )
+    _unique_id_suffix = "next_dose"
+    _name_format = "Next Dose of {}"
+
     def __init__(
         self,
         coordinator: MedicationTrackerCoordinator,
@@ -222,20 +248,22 @@ class MedicationNextDoseSensor(CoordinatorEntity, SensorEntity):
         device_info: DeviceInfo,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._patient = patient
-        self._medication = medication
-        self._entry = entry
-        self._attr_device_info = device_info
-        self._attr_unique_id = f"{entry.entry_id}_medication_{medication['id']}_next_dose"
-        self._attr_name = f"Next Dose of {medication.get(ATTR_MEDICATION_NAME, 'Unknown')}"
-        
-        self.entity_description = SensorEntityDescription(
-            key="next_dose",
-            name=self._attr_name,
-            icon="mdi:clock-time-four",
-            device_class=SensorDeviceClass.TIMESTAMP,
-        )
+        super().__init__(coordinator, entry, patient, medication, device_info)
+
+        # Medication details don't change while the entity exists
+        self._static_attrs = {
+            "dosage": medication.get(ATTR_MEDICATION_DOSAGE),
+            "unit": medication.get(ATTR_MEDICATION_UNIT),
+            "frequency": medication.get(ATTR_MEDICATION_FREQUENCY),
+            "instructions": medication.get(ATTR_MEDICATION_INSTRUCTIONS),
+            "medication_id": medication["id"],
+        }
+
+        # Unchanged next-dose results are reused by the coordinator, so the
+        # same object means nothing changed for this medication
+        self._dose_info = self._next_dose_info()
+        self._attr_native_value = self._build_native_value()
+        self._attr_extra_state_attributes = self._build_attributes()
 
     @property
     def available(self) -> bool:
@@ -243,47 +271,56 @@ class MedicationNextDoseSensor(CoordinatorEntity, SensorEntity):
         # Make available regardless of next dose calculation
         return True
 
-    @property
-    def native_value(self) -> Optional[datetime]:
-        """Return when the next dose is due."""
-        next_doses = self.coordinator.data.get("next_doses", {})
-        dose_info = next_doses.get(self._medication["id"], {})
-        
-        if not dose_info.get("available_now", True) and dose_info.get("next_time"):
-            try:
-                return datetime.fromisoformat(dose_info["next_time"])
-            except (ValueError, TypeError) as err:
-                _LOGGER.error("Invalid next_time format for medication %s: %s (Error: %s)", 
-                            self._medication["id"], dose_info["next_time"], err)
+    def _next_dose_info(self) -> Optional[Dict[str, Any]]:
+        """Return the coordinator's next-dose result for the medication."""
+        return self.coordinator.data.get("next_doses", {}).get(self._medication_id)
+
+    def _build_native_value(self) -> Optional[datetime]:
+        """Work out when the next dose is due."""
+        dose_info = self._dose_info
+        if dose_info and not dose_info.get("available_now", True):
+            # The coordinator provides the next dose time as a datetime
+            return dose_info.get("next_time")
         return None
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Return additional medication information."""
-        attributes = {
-            "dosage": self._medication.get(ATTR_MEDICATION_DOSAGE),
-            "unit": self._medication.get(ATTR_MEDICATION_UNIT),
-            "frequency": self._medication.get(ATTR_MEDICATION_FREQUENCY),
-            "instructions": self._medication.get(ATTR_MEDICATION_INSTRUCTIONS),
-            "medication_id": self._medication["id"],
-        }
-        
-        next_doses = self.coordinator.data.get("next_doses", {})
-        dose_info = next_doses.get(self._medication["id"], {})
+    def _build_attributes(self) -> Dict[str, Any]:
+        """Build the additional medication information."""
+        dose_info = self._dose_info
         
-        if dose_info:
-            attributes.update({
-                "available_now": dose_info.get("available_now", False),
-                "last_dose_time": dose_info.get("last_dose_time"),
-                "last_dose_amount": dose_info.get("last_dose_amount"),
-                "last_dose_unit": dose_info.get("last_dose_unit"),
-            })
+        if not dose_info:
+            return dict(self._static_attrs)
             
-        return attributes
+        return {
+            **self._static_attrs,
+            "available_now": dose_info.get("available_now", False),
+            "last_dose_time": dose_info.get("last_dose_time"),
+            "last_dose_amount": dose_info.get("last_dose_amount"),
+            "last_dose_unit": dose_info.get("last_dose_unit"),
+        }
 
-class MedicationLastDoseSensor(CoordinatorEntity, SensorEntity):
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the state only if the next-dose result changed."""
+        dose_info = self._next_dose_info()
+        if dose_info is self._dose_info:
+            # Always available, so there is nothing else to write
+            return
+        self._dose_info = dose_info
+        self._attr_native_value = self._build_native_value()
+        self._attr_extra_state_attributes = self._build_attributes()
+        super()._handle_coordinator_update()
+
+class MedicationLastDoseSensor(MedicationSensor):
     """Sensor representing the last recorded dose."""
 
+    entity_description = SensorEntityDescription(
+        key="last_dose",
+        icon="mdi:medication",
+        device_class=SensorDeviceClass.TIMESTAMP,
+    )
+    _unique_id_suffix = "last_dose"
+    _name_format = "Last Dose of {}"
+
     def __init__(
         self,
         coordinator: MedicationTrackerCoordinator,
@@ -293,20 +330,12 @@ class MedicationLastDoseSensor(CoordinatorEntity, SensorEntity):
         device_info: DeviceInfo,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._patient = patient
-        self._medication = medication
-        self._entry = entry
-        self._attr_device_info = device_info
-        self._attr_unique_id = f"{entry.entry_id}_medication_{medication['id']}_last_dose"
-        self._attr_name = f"Last Dose of {medication.get(ATTR_MEDICATION_NAME, 'Unknown')}"
-        
-        self.entity_description = SensorEntityDescription(
-            key="last_dose",
-            name=self._attr_name,
-            icon="mdi:medication",
-            device_class=SensorDeviceClass.TIMESTAMP,
-        )
+        super().__init__(coordinator, entry, patient, medication, device_info)
+
+        # Doses are only ever added, so the count tells if they changed
+        self._dose_count = len(self._doses())
+        self._attr_native_value = self._build_native_value()
+        self._attr_extra_state_attributes = self._build_attributes()
 
     @property
     def available(self) -> bool:
@@ -314,31 +343,51 @@ class MedicationLastDoseSensor(CoordinatorEntity, SensorEntity):
         # Make available regardless of dose history
         return True
 
-    @property
-    def native_value(self) -> Optional[datetime]:
-        """Return when the last dose was taken."""
-        doses = self.coordinator.data.get("doses", {}).get(self._medication["id"], [])
+    def _build_native_value(self) -> Optional[datetime]:
+        """Work out when the last dose was taken."""
+        medication_id = self._medication_id
+        doses = self._doses()
         if doses:
             try:
-                latest = sorted(doses, key=lambda x: x["timestamp"], reverse=True)[0]
-                return datetime.fromisoformat(latest["timestamp"])
-            except (ValueError, TypeError, IndexError) as err:
+                # Doses are stored oldest to newest
+                return datetime.fromisoformat(doses[-1]["timestamp"])
+            except (ValueError, TypeError, KeyError) as err:
                 _LOGGER.error("Error getting last dose for medication %s: %s", 
-                            self._medication["id"], err)
+                            medication_id, err)
         return None
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Return dose history."""
-        doses = self.coordinator.data.get("doses", {}).get(self._medication["id"], [])
+    def _build_attributes(self) -> Dict[str, Any]:
+        """Build the dose history attributes."""
+        medication_id = self._medication_id
+        doses = self._doses()
         return {
-            "history": sorted(doses, key=lambda x: x["timestamp"], reverse=True)[:10] if doses else [],
-            "medication_id": self._medication["id"],
+            "history": doses[-10:][::-1],
+            "medication_id": medication_id,
         }
 
-class MedicationComplianceSensor(CoordinatorEntity, SensorEntity):
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the state only if the dose history changed."""
+        dose_count = len(self._doses())
+        if dose_count == self._dose_count:
+            # Always available, so there is nothing else to write
+            return
+        self._dose_count = dose_count
+        self._attr_native_value = self._build_native_value()
+        self._attr_extra_state_attributes = self._build_attributes()
+        super()._handle_coordinator_update()
+
+class MedicationComplianceSensor(MedicationSensor):
     """Sensor representing medication compliance."""
 
+    entity_description = SensorEntityDescription(
+        key="compliance",
+        icon="mdi:chart-line",
+        native_unit_of_measurement="%",
+    )
+    _unique_id_suffix = "compliance"
+    _name_format = "{} Compliance"
+
     def __init__(
         self,
         coordinator: MedicationTrackerCoordinator,
@@ -348,30 +397,36 @@ class MedicationComplianceSensor(CoordinatorEntity, SensorEntity):
         device_info: DeviceInfo,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._patient = patient
-        self._medication = medication
-        self._entry = entry
-        self._attr_device_info = device_info
-        self._attr_unique_id = f"{entry.entry_id}_medication_{medication['id']}_compliance"
-        self._attr_name = f"{medication.get(ATTR_MEDICATION_NAME, 'Unknown')} Compliance"
-        
-        self.entity_description = SensorEntityDescription(
-            key="compliance",
-            name=self._attr_name,
-            icon="mdi:chart-line",
-            native_unit_of_measurement="%",
-        )
+        super().__init__(coordinator, entry, patient, medication, device_info)
+
+        # Doses are only ever added, so the count tells if they changed
+        self._state_key = (len(self._doses()), coordinator.last_update_success)
 
     @property
     def native_value(self) -> Optional[float]:
         """Return the compliance percentage."""
         # This could be expanded with more sophisticated compliance calculation
-        doses = self.coordinator.data.get("doses", {}).get(self._medication["id"], [])
-        if not doses:
+        doses = self._doses()
+        total_doses = len(doses)
+        if not total_doses:
             return 0
         
         # Simple compliance calculation - can be made more sophisticated
-        total_doses = len(doses)
-        on_time_doses = sum(1 for dose in doses if not dose.get("late", False))
-        return round((on_time_doses / total_doses) * 100, 1) if total_doses > 0 else 0 
\ No newline at end of file
+        late_doses = sum(1 for dose in doses if dose.get("late", False))
+        return round((total_doses - late_doses) * 100 / total_doses, 1)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the state only if the doses or availability changed."""
+        state_key = (len(self._doses()), self.coordinator.last_update_success)
+        if state_key == self._state_key:
+            return
+        self._state_key = state_key
+        super()._handle_coordinator_update()
+
+
+MEDICATION_SENSOR_CLASSES = (
+    MedicationNextDoseSensor,
+    MedicationLastDoseSensor,
+    MedicationComplianceSensor,
+)
@@ -7,6 +7,7 @@ from datetime import datetime
 import voluptuous as vol
 
 from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.util import dt as dt_util
 
@@ -37,17 +38,44 @@ from .const import (
     ATTR_TEMPERATURE_VALUE,
     ATTR_TEMPERATURE_UNIT,
 )
+from .coordinator import MedicationTrackerCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+# Validators shared by the service schemas
+_COERCE_FLOAT = vol.Coerce(float)
+_COERCE_INT = vol.Coerce(int)
+
+# Service fields copied verbatim into new patient and medication records
+_PATIENT_FIELDS = (
+    ATTR_PATIENT_NAME,
+    ATTR_PATIENT_WEIGHT,
+    ATTR_PATIENT_WEIGHT_UNIT,
+    ATTR_PATIENT_AGE,
+)
+_MEDICATION_FIELDS = (
+    ATTR_PATIENT_ID,
+    ATTR_MEDICATION_NAME,
+    ATTR_MEDICATION_DOSAGE,
+    ATTR_MEDICATION_UNIT,
+    ATTR_MEDICATION_FREQUENCY,
+    ATTR_MEDICATION_MAX_DAILY_DOSES,
+    ATTR_MEDICATION_INSTRUCTIONS,
+)
+
+
+def _utcnow_iso() -> str:
+    """Return the current UTC time as an ISO 8601 string."""
+    return dt_util.utcnow().isoformat()
+
 # Service schema for adding a patient
 ADD_PATIENT_SCHEMA = vol.Schema(
     {
         vol.Optional(ATTR_PATIENT_ID): cv.string,
         vol.Required(ATTR_PATIENT_NAME): cv.string,
-        vol.Optional(ATTR_PATIENT_WEIGHT): vol.Coerce(float),
+        vol.Optional(ATTR_PATIENT_WEIGHT): _COERCE_FLOAT,
         vol.Optional(ATTR_PATIENT_WEIGHT_UNIT, default="kg"): cv.string,
-        vol.Optional(ATTR_PATIENT_AGE): vol.Coerce(int),
+        vol.Optional(ATTR_PATIENT_AGE): _COERCE_INT,
     }
 )
 
@@ -64,10 +92,10 @@ ADD_MEDICATION_SCHEMA = vol.Schema(
         vol.Optional(ATTR_MEDICATION_ID): cv.string,
         vol.Required(ATTR_PATIENT_ID): cv.string,
         vol.Required(ATTR_MEDICATION_NAME): cv.string,
-        vol.Optional(ATTR_MEDICATION_DOSAGE): vol.Coerce(float),
+        vol.Optional(ATTR_MEDICATION_DOSAGE): _COERCE_FLOAT,
         vol.Optional(ATTR_MEDICATION_UNIT, default="mg"): cv.string,
-        vol.Optional(ATTR_MEDICATION_FREQUENCY, default=6): vol.Coerce(float),  # Hours
-        vol.Optional(ATTR_MEDICATION_MAX_DAILY_DOSES): vol.Coerce(int),
+        vol.Optional(ATTR_MEDICATION_FREQUENCY, default=6): _COERCE_FLOAT,  # Hours
+        vol.Optional(ATTR_MEDICATION_MAX_DAILY_DOSES): _COERCE_INT,
         vol.Optional(ATTR_MEDICATION_INSTRUCTIONS): cv.string,
     }
 )
@@ -83,10 +111,8 @@ REMOVE_MEDICATION_SCHEMA = vol.Schema(
 RECORD_DOSE_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_MEDICATION_ID): cv.string,
-        vol.Optional(
-            ATTR_DOSE_TIMESTAMP, default=lambda: dt_util.utcnow().isoformat()
-        ): cv.string,
-        vol.Optional(ATTR_DOSE_AMOUNT): vol.Coerce(float),
+        vol.Optional(ATTR_DOSE_TIMESTAMP, default=_utcnow_iso): cv.string,
+        vol.Optional(ATTR_DOSE_AMOUNT): _COERCE_FLOAT,
         vol.Optional(ATTR_DOSE_UNIT): cv.string,
     }
 )
@@ -95,40 +121,58 @@ RECORD_DOSE_SCHEMA = vol.Schema(
 RECORD_TEMPERATURE_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_PATIENT_ID): cv.string,
-        vol.Required(ATTR_TEMPERATURE_VALUE): vol.Coerce(float),
-        vol.Optional(
-            ATTR_TEMPERATURE_TIMESTAMP, default=lambda: dt_util.utcnow().isoformat()
-        ): cv.string,
+        vol.Required(ATTR_TEMPERATURE_VALUE): _COERCE_FLOAT,
+        vol.Optional(ATTR_TEMPERATURE_TIMESTAMP, default=_utcnow_iso): cv.string,
         vol.Optional(ATTR_TEMPERATURE_UNIT, default="°C"): cv.string,
     }
 )
 
 
+def _get_coordinator(
+    hass: HomeAssistant,
+    patient_id: str | None = None,
+    medication_id: str | None = None,
+) -> MedicationTrackerCoordinator:
+    """Return the coordinator owning a patient or medication.
+
+    Falls back to the first loaded coordinator when no entry owns the ID.
+    """
+    coordinators: list[MedicationTrackerCoordinator] = list(
+        hass.data.get(DOMAIN, {}).values()
+    )
+    if not coordinators:
+        raise HomeAssistantError("Medication Tracker is not loaded")
+
+    for coordinator in coordinators:
+        if medication_id and coordinator.storage.get_medication(medication_id):
+            return coordinator
+        if patient_id and coordinator.storage.get_patient(patient_id):
+            return coordinator
+    return coordinators[0]
+
+
 async def async_setup_services(hass: HomeAssistant) -> None:
     """Set up the Medication Tracker services."""
-
-    # Get the coordinator
-    coordinator = hass.data[DOMAIN].get("coordinator")
-    if not coordinator:
-        _LOGGER.error("Cannot set up services - coordinator not found")
+    # Services are shared by all config entries; only register them once
+    if hass.services.has_service(DOMAIN, SERVICE_RECORD_DOSE):
         return
 
     async def async_handle_add_patient(call: ServiceCall) -> None:
         """Handle the add_patient service call."""
-        patient_data = {
-            "id": call.data.get(ATTR_PATIENT_ID),
-            "name": call.data.get(ATTR_PATIENT_NAME),
-            "weight": call.data.get(ATTR_PATIENT_WEIGHT),
-            "weight_unit": call.data.get(ATTR_PATIENT_WEIGHT_UNIT),
-            "age": call.data.get(ATTR_PATIENT_AGE),
-        }
+        coordinator = _get_coordinator(hass)
+        data = call.data
+        patient_data = {"id": data.get(ATTR_PATIENT_ID)}
+        patient_data.update((field, data.get(field)) for field in _PATIENT_FIELDS)
 
         patient_id = await coordinator.add_patient(patient_data)
-        _LOGGER.info("Added patient %s with ID %s", patient_data["name"], patient_id)
+        _LOGGER.info(
+            "Added patient %s with ID %s", patient_data[ATTR_PATIENT_NAME], patient_id
+        )
 
     async def async_handle_remove_patient(call: ServiceCall) -> None:
         """Handle the remove_patient service call."""
         patient_id = call.data.get(ATTR_PATIENT_ID)
+        coordinator = _get_coordinator(hass, patient_id=patient_id)
         result = await coordinator.remove_patient(patient_id)
 
         if result:
@@ -140,25 +184,24 @@ async def async_setup_services(hass: HomeAssistant) -> None:
 
     async def async_handle_add_medication(call: ServiceCall) -> None:
         """Handle the add_medication service call."""
-        medication_data = {
-            "id": call.data.get(ATTR_MEDICATION_ID),
-            "patient_id": call.data.get(ATTR_PATIENT_ID),
-            "name": call.data.get(ATTR_MEDICATION_NAME),
-            "dosage": call.data.get(ATTR_MEDICATION_DOSAGE),
-            "unit": call.data.get(ATTR_MEDICATION_UNIT),
-            "frequency": call.data.get(ATTR_MEDICATION_FREQUENCY),
-            "max_daily_doses": call.data.get(ATTR_MEDICATION_MAX_DAILY_DOSES),
-            "instructions": call.data.get(ATTR_MEDICATION_INSTRUCTIONS),
-        }
+        data = call.data
+        coordinator = _get_coordinator(hass, patient_id=data.get(ATTR_PATIENT_ID))
+        medication_data = {"id": data.get(ATTR_MEDICATION_ID)}
+        medication_data.update(
+            (field, data.get(field)) for field in _MEDICATION_FIELDS
+        )
 
         medication_id = await coordinator.add_medication(medication_data)
         _LOGGER.info(
-            "Added medication %s with ID %s", medication_data["name"], medication_id
+            "Added medication %s with ID %s",
+            medication_data[ATTR_MEDICATION_NAME],
+            medication_id,
         )
 
     async def async_handle_remove_medication(call: ServiceCall) -> None:
         """Handle the remove_medication service call."""
         medication_id = call.data.get(ATTR_MEDICATION_ID)
+        coordinator = _get_coordinator(hass, medication_id=medication_id)
         result = await coordinator.remove_medication(medication_id)
 
         if result:
@@ -170,12 +213,14 @@ async def async_setup_services(hass: HomeAssistant) -> None:
 
     async def async_handle_record_dose(call: ServiceCall) -> None:
         """Handle the record_dose service call."""
-        medication_id = call.data.get(ATTR_MEDICATION_ID)
+        data = call.data
+        medication_id = data.get(ATTR_MEDICATION_ID)
+        coordinator = _get_coordinator(hass, medication_id=medication_id)
 
         dose_data = {
-            "timestamp": call.data.get(ATTR_DOSE_TIMESTAMP),
-            "amount": call.data.get(ATTR_DOSE_AMOUNT),
-            "unit": call.data.get(ATTR_DOSE_UNIT),
+            "timestamp": data.get(ATTR_DOSE_TIMESTAMP),
+            "amount": data.get(ATTR_DOSE_AMOUNT),
+            "unit": data.get(ATTR_DOSE_UNIT),
         }
 
         # Convert datetime object to ISO string if provided
@@ -193,12 +238,14 @@ async def async_setup_services(hass: HomeAssistant) -> None:
 
     async def async_handle_record_temperature(call: ServiceCall) -> None:
         """Handle the record_temperature service call."""
-        patient_id = call.data.get(ATTR_PATIENT_ID)
+        data = call.data
+        patient_id = data.get(ATTR_PATIENT_ID)
+        coordinator = _get_coordinator(hass, patient_id=patient_id)
 
         temperature_data = {
-            "timestamp": call.data.get(ATTR_TEMPERATURE_TIMESTAMP),
-            "value": call.data.get(ATTR_TEMPERATURE_VALUE),
-            "unit": call.data.get(ATTR_TEMPERATURE_UNIT),
+            "timestamp": data.get(ATTR_TEMPERATURE_TIMESTAMP),
+            "value": data.get(ATTR_TEMPERATURE_VALUE),
+            "unit": data.get(ATTR_TEMPERATURE_UNIT),
         }
 
         # Convert datetime object to ISO string if provided
@@ -1,24 +1,86 @@
 """Storage handling for Medication Tracker."""
 from __future__ import annotations
 
+import bisect
 import logging
+from operator import itemgetter
 import os
-from typing import Any, Dict, List, Optional, Set, Tuple, Union, cast
+import secrets
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from homeassistant.const import EVENT_HOMEASSISTANT_START
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.storage import Store
 
+from .const import (
+    ATTR_PATIENT_NAME,
+    ATTR_PATIENT_WEIGHT,
+    ATTR_PATIENT_WEIGHT_UNIT,
+    ATTR_PATIENT_AGE,
+    ATTR_MEDICATION_NAME,
+    ATTR_MEDICATION_DOSAGE,
+    ATTR_MEDICATION_UNIT,
+    ATTR_MEDICATION_FREQUENCY,
+    ATTR_MEDICATION_MAX_DAILY_DOSES,
+    ATTR_MEDICATION_INSTRUCTIONS,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
-STORAGE_VERSION = 1
+_timestamp_getter = itemgetter("timestamp")
+
+STORAGE_VERSION = 2
 STORAGE_KEY = "ha_medication_tracker"
-DATA_SCHEMA = {
-    "patients": [],
-    "medications": {},
-    "doses": {},
-    "temperatures": {}
-}
+SAVE_DELAY = 0.5
+
+# Version 1 records created through the services used bare keys
+_V1_PATIENT_KEYS = (
+    ("name", ATTR_PATIENT_NAME),
+    ("weight", ATTR_PATIENT_WEIGHT),
+    ("weight_unit", ATTR_PATIENT_WEIGHT_UNIT),
+    ("age", ATTR_PATIENT_AGE),
+)
+_V1_MEDICATION_KEYS = (
+    ("name", ATTR_MEDICATION_NAME),
+    ("dosage", ATTR_MEDICATION_DOSAGE),
+    ("unit", ATTR_MEDICATION_UNIT),
+    ("frequency", ATTR_MEDICATION_FREQUENCY),
+    ("max_daily_doses", ATTR_MEDICATION_MAX_DAILY_DOSES),
+    ("instructions", ATTR_MEDICATION_INSTRUCTIONS),
+)
+
+
+def _rename_keys(record: Dict[str, Any], keys: Tuple[Tuple[str, str], ...]) -> None:
+    """Move bare keys to their attribute names unless already present."""
+    for old_key, new_key in keys:
+        if old_key in record:
+            value = record.pop(old_key)
+            record.setdefault(new_key, value)
+
+
+class _MedicationStore(Store):
+    """Store that migrates older medication data layouts."""
+
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Migrate the stored data to the current version."""
+        if old_major_version < 2:
+            for patient in old_data.get("patients", []):
+                _rename_keys(patient, _V1_PATIENT_KEYS)
+            for medication in old_data.get("medications", {}).values():
+                _rename_keys(medication, _V1_MEDICATION_KEYS)
+        return old_data
+
+
+def _fresh_schema() -> Dict[str, Any]:
+    """Return a new, empty storage layout."""
+    return {
+        "patients": [],
+        "medications": {},
+        "doses": {},
+        "temperatures": {}
+    }
 
 
 class MedicationStorage:
@@ -27,8 +89,12 @@ class MedicationStorage:
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize the storage."""
         self.hass = hass
-        self.store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self.store = _MedicationStore(hass, STORAGE_VERSION, STORAGE_KEY)
         self._data: Dict[str, Any] = None
+        # Patients keyed by ID, kept in step with the patients list
+        self._patients_by_id: Dict[str, Dict[str, Any]] = {}
+        # Medications keyed by ID, grouped by the patient they belong to
+        self._meds_by_patient: Dict[str, Dict[str, Dict[str, Any]]] = {}
 
     async def async_load(self) -> Dict[str, Any]:
         """Load the data from disk."""
@@ -38,10 +104,21 @@ class MedicationStorage:
         data = await self.store.async_load()
         
         if data is None:
-            self._data = dict(DATA_SCHEMA)
+            self._data = _fresh_schema()
         else:
             self._data = data
+            # Keep every dose and temperature list ordered oldest to newest
+            for doses in self._data["doses"].values():
+                doses.sort(key=_timestamp_getter)
+            for temperatures in self._data["temperatures"].values():
+                temperatures.sort(key=_timestamp_getter)
 
+        self._patients_by_id = {
+            patient["id"]: patient for patient in self._data["patients"]
+        }
+        self._meds_by_patient = {}
+        for med_id, med in self._data["medications"].items():
+            self._meds_by_patient.setdefault(med.get("patient_id"), {})[med_id] = med
         return self._data
 
     async def async_save(self) -> None:
@@ -49,6 +126,12 @@ class MedicationStorage:
         if self._data is not None:
             await self.store.async_save(self._data)
 
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the data to disk after a short delay, coalescing bursts."""
+        if self._data is not None:
+            self.store.async_delay_save(lambda: self._data, SAVE_DELAY)
+
     def get_patients(self) -> List[Dict[str, Any]]:
         """Get all patients."""
         if not self._data:
@@ -57,17 +140,14 @@ class MedicationStorage:
 
     def get_patient(self, patient_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific patient."""
-        for patient in self._data["patients"]:
-            if patient.get("id") == patient_id:
-                return patient
-        return None
+        return self._patients_by_id.get(patient_id)
 
     def add_patient(self, patient: Dict[str, Any]) -> str:
         """Add a patient."""
         patient_id = patient.get("id")
         if not patient_id:
             # Generate a unique ID
-            patient_id = f"patient_{len(self._data['patients']) + 1}"
+            patient_id = secrets.token_hex(16)
             patient["id"] = patient_id
             
         # Check if patient already exists
@@ -79,26 +159,23 @@ class MedicationStorage:
         else:
             # Add new patient
             self._data["patients"].append(patient)
+            self._patients_by_id[patient_id] = patient
             
         return patient_id
 
     def remove_patient(self, patient_id: str) -> bool:
         """Remove a patient."""
-        for i, patient in enumerate(self._data["patients"]):
-            if patient.get("id") == patient_id:
-                self._data["patients"].pop(i)
-                
-                # Clean up related medications
-                meds_to_remove = []
-                for med_id, med in self._data["medications"].items():
-                    if med.get("patient_id") == patient_id:
-                        meds_to_remove.append(med_id)
-                        
-                for med_id in meds_to_remove:
-                    self.remove_medication(med_id)
-                    
-                return True
-        return False
+        patient = self._patients_by_id.pop(patient_id, None)
+        if patient is None:
+            return False
+            
+        self._data["patients"].remove(patient)
+        
+        # Clean up related medications
+        for med_id in self._meds_by_patient.pop(patient_id, {}):
+            self.remove_medication(med_id)
+            
+        return True
 
     def get_medications(self, patient_id: Optional[str] = None) -> Dict[str, Any]:
         """Get medications, optionally filtered by patient."""
@@ -106,11 +183,7 @@ class MedicationStorage:
             return {}
             
         if patient_id:
-            return {
-                med_id: med 
-                for med_id, med in self._data["medications"].items() 
-                if med.get("patient_id") == patient_id
-            }
+            return self._meds_by_patient.get(patient_id, {})
         return self._data["medications"]
 
     def get_medication(self, medication_id: str) -> Optional[Dict[str, Any]]:
@@ -122,16 +195,32 @@ class MedicationStorage:
         medication_id = medication.get("id")
         if not medication_id:
             # Generate a unique ID
-            medication_id = f"medication_{len(self._data['medications']) + 1}"
+            medication_id = secrets.token_hex(16)
             medication["id"] = medication_id
         
+        previous = self._data["medications"].get(medication_id)
+        if previous is not None:
+            self._unindex_medication(medication_id, previous)
         self._data["medications"][medication_id] = medication
+        self._meds_by_patient.setdefault(medication.get("patient_id"), {})[
+            medication_id
+        ] = medication
         return medication_id
 
+    def _unindex_medication(
+        self, medication_id: str, medication: Dict[str, Any]
+    ) -> None:
+        """Drop a medication from the patient index."""
+        patient_meds = self._meds_by_patient.get(medication.get("patient_id"))
+        if patient_meds is not None:
+            patient_meds.pop(medication_id, None)
+
     def remove_medication(self, medication_id: str) -> bool:
         """Remove a medication."""
         if medication_id in self._data["medications"]:
-            del self._data["medications"][medication_id]
+            self._unindex_medication(
+                medication_id, self._data["medications"].pop(medication_id)
+            )
             
             # Clean up related doses
             if medication_id in self._data["doses"]:
@@ -154,14 +243,19 @@ class MedicationStorage:
         return self._data["doses"]
 
     def add_dose(self, medication_id: str, dose: Dict[str, Any]) -> bool:
-        """Add a dose record."""
+        """Add a dose record.
+
+        The dose dict is stored as-is, not copied; callers must not reuse it.
+        """
         if medication_id not in self._data["medications"]:
             return False
             
-        if medication_id not in self._data["doses"]:
-            self._data["doses"][medication_id] = []
-            
-        self._data["doses"][medication_id].append(dose)
+        # Insert in timestamp order so the latest dose is always last
+        bisect.insort(
+            self._data["doses"].setdefault(medication_id, []),
+            dose,
+            key=_timestamp_getter,
+        )
         return True
 
     def get_temperatures(self, patient_id: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
@@ -178,12 +272,18 @@ class MedicationStorage:
         return self._data["temperatures"]
 
     def add_temperature(self, patient_id: str, temperature: Dict[str, Any]) -> bool:
-        """Add a temperature record."""
+        """Add a temperature record.
+
+        The temperature dict is stored as-is, not copied; callers must not
+        reuse it.
+        """
         if not self.get_patient(patient_id):
             return False
             
-        if patient_id not in self._data["temperatures"]:
-            self._data["temperatures"][patient_id] = []
-            
-        self._data["temperatures"][patient_id].append(temperature)
+        # Insert in timestamp order so the latest reading is always last
+        bisect.insort(
+            self._data["temperatures"].setdefault(patient_id, []),
+            temperature,
+            key=_timestamp_getter,
+        )
         return True 
\ No newline at end of file
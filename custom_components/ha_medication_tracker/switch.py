@@ -9,7 +9,8 @@ from homeassistant.components.switch import (
     SwitchEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
@@ -31,54 +32,48 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Medication Tracker switches."""
-    coordinator = hass.data[DOMAIN].get("coordinator")
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
     if not coordinator:
         _LOGGER.error("Cannot set up switches - coordinator not found")
         return
 
-    _LOGGER.debug("Setting up Medication Tracker switches")
-    entities = []
-    
-    # Create switches for each patient's medications
-    patients = coordinator.data.get("patients", [])
-    _LOGGER.debug("Found %d patients to create switches for", len(patients))
-    
-    for patient in patients:
-        _LOGGER.debug("Creating switches for patient: %s", patient.get(ATTR_PATIENT_NAME))
-        # Create the patient device info
-        device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{entry.entry_id}_{patient['id']}")},
-            name=patient.get(ATTR_PATIENT_NAME, "Unknown Patient"),
-            manufacturer="Medication Tracker",
-            model="Patient Profile",
-            sw_version="1.0",
+    get_medications_for = coordinator.get_medications_for
+    patient_infos = [
+        (patient, coordinator.device_info_for(patient))
+        for patient in coordinator.data.get("patients", {}).values()
+    ]
+
+    # Medication tracking switches for each patient's medications
+    entities = [
+        MedicationTrackingSwitch(
+            coordinator=coordinator,
+            entry=entry,
+            patient=patient,
+            medication=medication,
+            device_info=device_info,
         )
-        
-        # Add medication tracking switches for each medication
-        patient_medications = [
-            med for med_id, med in coordinator.data.get("medications", {}).items()
-            if med.get("patient_id") == patient["id"]
-        ]
-        _LOGGER.debug("Found %d medications for patient %s", len(patient_medications), patient.get(ATTR_PATIENT_NAME))
-        
-        for medication in patient_medications:
-            _LOGGER.debug("Creating switch for medication: %s", medication.get(ATTR_MEDICATION_NAME))
-            entities.append(
-                MedicationTrackingSwitch(
-                    coordinator=coordinator,
-                    entry=entry,
-                    patient=patient,
-                    medication=medication,
-                    device_info=device_info,
-                )
-            )
+        for patient, device_info in patient_infos
+        for medication in get_medications_for(patient["id"])
+    ]
 
-    _LOGGER.debug("Created %d total switches", len(entities))
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(
+            "Created %d medication tracking switches for %d patients",
+            len(entities),
+            len(patient_infos),
+        )
+    if not entities:
+        return
     async_add_entities(entities)
 
 class MedicationTrackingSwitch(CoordinatorEntity, SwitchEntity):
     """Switch for enabling/disabling medication tracking."""
 
+    entity_description = SwitchEntityDescription(
+        key="medication_tracking",
+        icon="mdi:medication",
+    )
+
     def __init__(
         self,
         coordinator: MedicationTrackerCoordinator,
@@ -89,38 +84,63 @@ class MedicationTrackingSwitch(CoordinatorEntity, SwitchEntity):
     ) -> None:
         """Initialize the switch."""
         super().__init__(coordinator)
-        self._patient = patient
-        self._medication = medication
-        self._entry = entry
+        self._patient_id = patient["id"]
+        self._medication_id = medication["id"]
         self._attr_device_info = device_info
-        self._attr_unique_id = f"{entry.entry_id}_medication_{medication['id']}_tracking"
+        self._attr_unique_id = f"{entry.entry_id}_medication_{self._medication_id}_tracking"
         self._attr_name = f"Track {medication.get(ATTR_MEDICATION_NAME, 'Unknown')}"
-        
-        self.entity_description = SwitchEntityDescription(
-            key="medication_tracking",
-            name=self._attr_name,
-            icon="mdi:medication",
-        )
+        self._attr_extra_state_attributes = self._build_attributes()
+        self._attr_is_on = not medication.get("disabled", False)
+        self._available = coordinator.last_update_success
 
     @property
-    def is_on(self) -> bool:
-        """Return True if tracking is enabled."""
-        return not self._medication.get("disabled", False)
+    def _medication(self) -> Dict[str, Any]:
+        """Return the medication from the coordinator data."""
+        return self.coordinator.data.get("medications", {}).get(self._medication_id, {})
+
+    @property
+    def _patient(self) -> Dict[str, Any]:
+        """Return the patient from the coordinator data."""
+        return self.coordinator.data.get("patients", {}).get(self._patient_id, {})
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Enable tracking for this medication."""
-        self._medication["disabled"] = False
-        await self.coordinator.async_request_refresh()
+        if not self.coordinator.set_medication_tracking(self._medication_id, True):
+            raise HomeAssistantError(
+                f"Cannot enable tracking, medication {self._medication_id} not found"
+            )
+        self._attr_is_on = True
+        self.async_write_ha_state()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Disable tracking for this medication."""
-        self._medication["disabled"] = True
-        await self.coordinator.async_request_refresh()
+        if not self.coordinator.set_medication_tracking(self._medication_id, False):
+            raise HomeAssistantError(
+                f"Cannot disable tracking, medication {self._medication_id} not found"
+            )
+        self._attr_is_on = False
+        self.async_write_ha_state()
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Return additional state attributes."""
+    def _build_attributes(self) -> Dict[str, Any]:
+        """Build the additional state attributes."""
         return {
             "patient_name": self._patient.get(ATTR_PATIENT_NAME),
             "medication_name": self._medication.get(ATTR_MEDICATION_NAME),
-        } 
\ No newline at end of file
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the state only if it, the attributes or availability changed."""
+        medication = self._medication
+        is_on = not medication.get("disabled", False)
+        attributes = self._build_attributes()
+        if (
+            is_on == self._attr_is_on
+            and attributes == self._attr_extra_state_attributes
+            and self.coordinator.last_update_success == self._available
+        ):
+            return
+        self._attr_is_on = is_on
+        self._attr_extra_state_attributes = attributes
+        self._available = self.coordinator.last_update_success
+        super()._handle_coordinator_update()